@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 from queries import get_query, list_queries
+from safety import LlamaGuard
 from validation_agent import validate_response_tool, get_validation_logs
 from langchain_community.graphs import Neo4jGraph
 from langchain_community.vectorstores.neo4j_vector import remove_lucene_chars
@@ -55,15 +56,15 @@ def get_llm_instance():
 
 llm = get_llm_instance()
 
-# LlamaGuard for response safety
-class LlamaGuard:
-    def is_safe(self, response: str) -> bool:
-        """validate if the response is safe (mock implementation for now)"""
-        # custom logic can be added here
-        return True
 
+# LlamaGuard for response safety, cached so the verdict cache survives Streamlit reruns
+@st.cache_resource
+def get_llama_guard() -> LlamaGuard:
+    """initialize or retrieve the shared LlamaGuard instance"""
+    return LlamaGuard()
 
-llama_guard = LlamaGuard()
+
+llama_guard = get_llama_guard()
 
 # create full-text search indices in Neo4j
 graph.query(
@@ -149,12 +150,15 @@ def process_query(user_query: str, query_name: str, parameters: Optional[Dict[st
         result = get_benefit_info(query_name=query_name, parameters=parameters or {})
         chatbot_response = str(result)
 
-        # safety validation
-        if not llama_guard.is_safe(chatbot_response):
+        # safety validation runs in the background while the log entry is prepared
+        safety_check = llama_guard.submit(chatbot_response, user_query)
+        log_entry = {"query": user_query, "response": chatbot_response}
+
+        if not safety_check.result():
             return {"error": "Response contains unsafe content.", "response": None}
 
         # log response and validation
-        logs.append({"query": user_query, "response": chatbot_response})
+        logs.append(log_entry)
 
         return {"response": chatbot_response, "logs": logs}
 
@@ -0,0 +1,176 @@
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+# weighted trigger terms for the local pre-filter; most benefit answers hit none of them
+UNSAFE_TERMS = {
+    "kill yourself": 1.0,
+    "fake payslip": 0.8,
+    "forged document": 0.8,
+    "hide your income": 0.7,
+    "bomb": 0.6,
+    "claim twice": 0.6,
+    "stolen identity": 0.5,
+    "avoid detection": 0.5,
+    "weapon": 0.4,
+    "national insurance number of": 0.4,
+}
+
+# sensitive but common in neutral benefit answers (bereavement, PIP, ESA):
+# they send a response to the model but never block it on their own
+REVIEW_ONLY_TERMS = {"suicide", "self-harm", "murder", "overdose"}
+
+
+class LlamaGuard:
+    """
+    tiered response safety check: a compiled keyword pre-filter clears most
+    responses locally, only borderline ones are sent to the Llama Guard model
+    """
+
+    def __init__(
+        self,
+        terms: Optional[Dict[str, float]] = None,
+        review_only: Optional[set] = None,
+        clear_below: float = 0.3,
+        block_at: float = 1.0,
+        cache_size: int = 1024,
+        timeout: float = 5.0,
+    ):
+        terms = terms if terms is not None else UNSAFE_TERMS
+        review_only = review_only if review_only is not None else REVIEW_ONLY_TERMS
+        self.terms = {term.lower(): weight for term, weight in terms.items()}
+        self.review_only = {term.lower() for term in review_only}
+        # single alternation, longest terms first so overlapping phrases match whole;
+        # the optional suffix catches simple plurals and verb forms
+        all_terms = set(self.terms) | self.review_only
+        alternation = "|".join(re.escape(term) for term in sorted(all_terms, key=len, reverse=True))
+        self._pattern = re.compile(rf"\b({alternation})(?:s|es|d|ed|ing)?\b", re.IGNORECASE) if all_terms else None
+        self.clear_below = clear_below
+        self.block_at = block_at
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self._cache: "OrderedDict[str, bool]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._guard_llm = None
+        self._guard_unavailable = False
+
+    def score(self, response: str) -> float:
+        """
+        sum the weights of the distinct trigger terms found in the response;
+        a review-only term lifts the score to clear_below, never to block_at
+        """
+        if self._pattern is None:
+            return 0.0
+        hits = {match.group(1).lower() for match in self._pattern.finditer(response)}
+        score = sum(self.terms[hit] for hit in hits if hit in self.terms)
+        if hits & self.review_only:
+            score = max(score, self.clear_below)
+        return score
+
+    def is_safe(self, response: str, user_query: str = "") -> bool:
+        """validate if the response is safe"""
+        score = self.score(response)
+        if score < self.clear_below:
+            return True
+        if score >= self.block_at:
+            return False
+        return self._borderline_verdict(response, user_query, score)
+
+    def submit(self, response: str, user_query: str = "") -> Future:
+        """
+        start the safety check without waiting for it, so the caller can carry
+        on with its own work; call .result() before releasing the response
+        """
+        future: Future = Future()
+        score = self.score(response)
+        if score < self.clear_below:
+            future.set_result(True)
+        elif score >= self.block_at:
+            future.set_result(False)
+        else:
+            def run():
+                try:
+                    future.set_result(self._borderline_verdict(response, user_query, score))
+                except Exception as e:
+                    future.set_exception(e)
+
+            threading.Thread(target=run, name="llama-guard", daemon=True).start()
+        return future
+
+    def _borderline_verdict(self, response: str, user_query: str, score: float) -> bool:
+        """defer to the model, reusing earlier verdicts for the same query and response"""
+        key = hashlib.sha256(f"{user_query}\0{response}".encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+
+        if owner:
+            verdict = None
+            try:
+                verdict = self._model_check(response, user_query)
+            finally:
+                with self._lock:
+                    if verdict is not None:
+                        self._cache[key] = verdict
+                        if len(self._cache) > self.cache_size:
+                            self._cache.popitem(last=False)
+                    del self._pending[key]
+                pending.set_result(verdict)
+        else:
+            # another thread is already asking the model; its request is bounded by the client timeout
+            verdict = pending.result()
+
+        if verdict is None:
+            logging.warning("Llama Guard unavailable; accepting borderline response (score %.2f).", score)
+            return True
+        return verdict
+
+    def _get_guard_llm(self):
+        """initialize or retrieve the Llama Guard client, None if it cannot be created"""
+        with self._lock:
+            if self._guard_llm is None and not self._guard_unavailable:
+                try:
+                    from langchain_groq import ChatGroq
+
+                    self._guard_llm = ChatGroq(
+                        model="llama-guard-3-8b",
+                        temperature=0.0,
+                        timeout=self.timeout,
+                        max_retries=0,
+                    )
+                except Exception as e:
+                    # e.g. langchain_groq not installed or GROQ_API_KEY missing; don't retry
+                    logging.warning(f"Llama Guard not available; model check disabled: {str(e)}")
+                    self._guard_unavailable = True
+            return self._guard_llm
+
+    def _model_check(self, response: str, user_query: str) -> Optional[bool]:
+        """ask the Llama Guard model for a verdict, None if it cannot be reached"""
+        try:
+            guard_llm = self._get_guard_llm()
+            if guard_llm is None:
+                return None
+            from langchain.schema import AIMessage, HumanMessage
+
+            # llama guard classifies the last turn, so the response goes in as the assistant's;
+            # without a query the response is checked on its own as the only turn
+            if user_query:
+                messages = [HumanMessage(content=user_query), AIMessage(content=response)]
+            else:
+                messages = [HumanMessage(content=response)]
+            result = guard_llm.invoke(messages)
+        except Exception as e:
+            logging.warning(f"Llama Guard check failed: {str(e)}")
+            return None
+        # llama guard answers "safe" or "unsafe" followed by the violated categories
+        return result.content.strip().lower().startswith("safe")
@@ -0,0 +1,203 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from safety import LlamaGuard
+
+
+class StubGuard(LlamaGuard):
+    """LlamaGuard with the model call replaced by a fixed verdict"""
+
+    def __init__(self, verdict=True, **kwargs):
+        super().__init__(**kwargs)
+        self.verdict = verdict
+        self.calls = []
+
+    def _model_check(self, response, user_query):
+        self.calls.append((response, user_query))
+        return self.verdict
+
+
+def test_plain_answer_is_cleared_locally():
+    guard = StubGuard()
+    assert guard.score("Child Benefit is paid every 4 weeks.") == 0
+    assert guard.is_safe("Child Benefit is paid every 4 weeks.")
+    assert guard.calls == []
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "PIP and ESA support people at risk of suicide or self-harm.",
+        "Bereavement Support Payment after a murder or suicide.",
+    ],
+)
+def test_sensitive_terms_go_to_model_instead_of_blocking(response):
+    guard = StubGuard(verdict=True)
+    assert guard.clear_below <= guard.score(response) < guard.block_at
+    assert guard.is_safe(response, "what support is there?")
+    assert guard.calls == [(response, "what support is there?")]
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "Here is how to make bombs and weapons",
+        "Use a fake payslips to claim",
+    ],
+)
+def test_inflected_terms_are_scored(response):
+    guard = StubGuard()
+    assert guard.score(response) >= guard.clear_below
+
+
+def test_clearly_unsafe_term_blocks_without_model():
+    guard = StubGuard()
+    assert not guard.is_safe("You should kill yourself.")
+    assert guard.calls == []
+
+
+def test_model_verdict_is_used_for_borderline_response():
+    guard = StubGuard(verdict=False)
+    assert not guard.is_safe("Report a stolen identity to the DWP.")
+    assert len(guard.calls) == 1
+
+
+def test_verdict_cache_is_keyed_on_query_and_response():
+    guard = StubGuard(verdict=True)
+    response = "Bereavement Support Payment after a murder."
+    assert guard.is_safe(response, "what can I claim?")
+    guard.verdict = False
+    assert not guard.is_safe(response, "how do I get away with it?")
+    assert guard.is_safe(response, "what can I claim?")
+    assert len(guard.calls) == 2
+
+
+def test_verdict_cache_hit():
+    guard = StubGuard()
+    response = "Bereavement Support Payment after a murder."
+    assert guard.is_safe(response)
+    assert guard.is_safe(response)
+    assert len(guard.calls) == 1
+
+
+def test_verdict_cache_evicts_least_recently_used():
+    guard = StubGuard(cache_size=2)
+    first, second, third = (f"Support after a suicide, case {i}." for i in range(3))
+    guard.is_safe(first)
+    guard.is_safe(second)
+    guard.is_safe(first)
+    guard.is_safe(third)
+    guard.calls.clear()
+
+    guard.is_safe(first)
+    guard.is_safe(second)
+    assert [response for response, _ in guard.calls] == [second]
+
+
+def test_unreachable_model_fails_open_without_caching():
+    guard = StubGuard(verdict=None)
+    response = "Bereavement Support Payment after a murder."
+    assert guard.is_safe(response)
+    assert guard.is_safe(response)
+    assert len(guard.calls) == 2
+
+
+def test_concurrent_checks_share_one_model_call():
+    class SlowGuard(StubGuard):
+        def _model_check(self, response, user_query):
+            time.sleep(0.1)
+            return super()._model_check(response, user_query)
+
+    guard = SlowGuard(verdict=False)
+    response = "Bereavement Support Payment after a murder."
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(guard.is_safe(response))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [False] * 4
+    assert len(guard.calls) == 1
+
+
+def test_empty_terms_are_respected():
+    guard = StubGuard(terms={})
+    assert guard.score("You should kill yourself.") == 0
+
+
+def test_waiter_outlasts_guard_timeout():
+    class SlowGuard(StubGuard):
+        def _model_check(self, response, user_query):
+            time.sleep(0.2)
+            return super()._model_check(response, user_query)
+
+    guard = SlowGuard(verdict=False, timeout=0.05)
+    response = "Bereavement Support Payment after a murder."
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(guard.is_safe(response))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [False, False]
+    assert len(guard.calls) == 1
+
+
+def test_submit_overlaps_model_check_with_caller():
+    released = threading.Event()
+
+    class WaitingGuard(StubGuard):
+        def _model_check(self, response, user_query):
+            # only finishes once the caller has moved on past submit()
+            assert released.wait(timeout=2)
+            return super()._model_check(response, user_query)
+
+    guard = WaitingGuard(verdict=False)
+    check = guard.submit("Bereavement Support Payment after a murder.", "what can I claim?")
+    assert not check.done()
+    released.set()
+    assert check.result(timeout=2) is False
+
+
+def test_submit_resolves_local_verdicts_immediately():
+    guard = StubGuard()
+    assert guard.submit("Child Benefit is paid every 4 weeks.").result(timeout=0) is True
+    assert guard.submit("You should kill yourself.").result(timeout=0) is False
+    assert guard.calls == []
+
+
+def test_model_check_without_query_sends_single_turn(monkeypatch):
+    schema = types.ModuleType("langchain.schema")
+    schema.HumanMessage = lambda content: ("user", content)
+    schema.AIMessage = lambda content: ("assistant", content)
+    monkeypatch.setitem(sys.modules, "langchain", types.ModuleType("langchain"))
+    monkeypatch.setitem(sys.modules, "langchain.schema", schema)
+
+    sent = []
+
+    class FakeClient:
+        def invoke(self, messages):
+            sent.append(messages)
+            return types.SimpleNamespace(content="safe")
+
+    guard = LlamaGuard()
+    guard._guard_llm = FakeClient()
+    assert guard._model_check("some response", "") is True
+    assert guard._model_check("some response", "a question") is True
+    assert sent == [
+        [("user", "some response")],
+        [("user", "a question"), ("assistant", "some response")],
+    ]
+
+
+def test_unavailable_client_is_remembered(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "langchain_groq", None)
+    guard = LlamaGuard()
+    with caplog.at_level("WARNING"):
+        assert guard._get_guard_llm() is None
+        assert guard._get_guard_llm() is None
+    assert sum("model check disabled" in record.message for record in caplog.records) == 1